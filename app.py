@@ -1,12 +1,28 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 from datetime import datetime
+import json
 import random
-import subprocess
-import os
+
+from rdx_store import RDXStore, format_beat, parse_timestamp
+from system_monitor import JournalTailer, ServiceMonitor, SovereigntyProbe, SystemSampler
 
 app = Flask(__name__)
 
+# Azure metadata probe runs in the background; /api/status reads the cache
+sovereignty_probe = SovereigntyProbe()
+sovereignty_probe.start()
+
+# /proc sampler feeding /api/admin/system
+system_sampler = SystemSampler()
+system_sampler.start()
+
+# One batched systemctl query per TTL for /api/admin/services
+service_monitor = ServiceMonitor()
+
+# One shared journalctl --follow reader for every log poller and stream
+journal_tailer = JournalTailer()
+
 # Enable CORS for your surge.sh domain
 CORS(app, resources={
     r"/api/*": {
@@ -24,23 +40,6 @@ def get_5g_metrics():
         "quality": "excellent"
     }
 
-def calculate_sovereignty_score():
-    """Calculate sovereignty score based on system metrics"""
-    base_score = 95
-    
-    # Check various factors
-    try:
-        # Check if running on Azure
-        azure_check = subprocess.run(['curl', '-s', '-H', 'Metadata:true', 
-                                    'http://169.254.169.254/metadata/instance?api-version=2021-02-01'],
-                                   capture_output=True, timeout=2)
-        if azure_check.returncode == 0:
-            base_score += 3
-    except:
-        pass
-    
-    return min(base_score, 100)
-
 def detect_sovereign_networks():
     """Detect other sovereign network nodes"""
     return [
@@ -67,13 +66,20 @@ def detect_sovereign_networks():
 @app.route('/api/status', methods=['GET'])
 def get_status():
     """Main status endpoint"""
+    probe = sovereignty_probe.snapshot()
     return jsonify({
         "status": "operational",
         "timestamp": datetime.now().isoformat(),
         "node": "sanctuary-prime",
         "location": "Azure West US 2",
         "ip": "4.155.102.77",
-        "sovereignty_score": calculate_sovereignty_score(),
+        "sovereignty_score": probe["score"],
+        "sovereignty_probe": {
+            "last_run": probe["last_run"],
+            "duration_ms": probe["duration_ms"],
+            "on_azure": probe["on_azure"],
+            "ttl": probe["ttl"]
+        },
         "5g_metrics": get_5g_metrics(),
         "sovereign_networks": detect_sovereign_networks()
     })
@@ -82,54 +88,62 @@ def get_status():
 def get_system_info():
     """System information"""
     try:
-        uptime = subprocess.run(['uptime', '-p'], capture_output=True, text=True)
-        disk = subprocess.run(['df', '-h', '/'], capture_output=True, text=True)
-        memory = subprocess.run(['free', '-h'], capture_output=True, text=True)
-        
-        return jsonify({
-            "uptime": uptime.stdout.strip(),
-            "disk": disk.stdout.split('\n')[1] if disk.returncode == 0 else "N/A",
-            "memory": memory.stdout.split('\n')[1] if memory.returncode == 0 else "N/A",
-            "status": "healthy"
-        })
+        latest = system_sampler.latest() or system_sampler.sample_once()
+        if latest is None:
+            return jsonify({"error": system_sampler.last_error or "no sample"}), 500
+
+        response = dict(latest)
+        response["status"] = "healthy"
+        response["interval"] = system_sampler.interval
+
+        window = request.args.get('window', type=float)
+        if window:
+            response["history"] = system_sampler.history(window)
+
+        return jsonify(response)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/admin/logs', methods=['GET'])
 def get_logs():
-    """Recent system logs"""
+    """Recent system logs, optionally only those after ?cursor="""
     try:
-        logs = subprocess.run(['journalctl', '-n', '50', '--no-pager'], 
-                            capture_output=True, text=True)
+        journal_tailer.start()
+        journal_tailer.wait_ready(1)
+
+        cursor = request.args.get('cursor')
+        limit = min(request.args.get('limit', 20, type=int), 1000)
+        entries, next_cursor, reset = journal_tailer.entries_after(cursor, limit)
+
         return jsonify({
-            "logs": logs.stdout.split('\n')[-20:] if logs.returncode == 0 else []
+            "logs": [f"{e['timestamp']} {e['unit']}: {e['message']}" for e in entries],
+            "entries": entries,
+            "cursor": next_cursor,
+            "reset": reset
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/admin/logs/stream', methods=['GET'])
+def stream_logs():
+    """Follow the journal as Server-Sent Events"""
+    journal_tailer.start()
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('cursor')
+
+    def generate():
+        for entry in journal_tailer.follow(cursor):
+            if entry is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"id: {entry['cursor']}\ndata: {json.dumps(entry)}\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.route('/api/admin/services', methods=['GET'])
 def get_services():
     """Service status"""
-    services = ['flask-api', 'nginx', 'ssh']
-    status_list = []
-    
-    for service in services:
-        try:
-            result = subprocess.run(['systemctl', 'is-active', service],
-                                  capture_output=True, text=True)
-            status_list.append({
-                "name": service,
-                "status": result.stdout.strip(),
-                "active": result.returncode == 0
-            })
-        except:
-            status_list.append({
-                "name": service,
-                "status": "unknown",
-                "active": False
-            })
-    
-    return jsonify({"services": status_list})
+    return jsonify(service_monitor.status())
 
 @app.route('/api/operations/charter', methods=['GET'])
 def get_charter_data():
@@ -175,6 +189,7 @@ def index():
             "/api/status",
             "/api/admin/system",
             "/api/admin/logs",
+            "/api/admin/logs/stream",
             "/api/admin/services",
             "/api/operations/charter",
             "/api/operations/osun-wing",
@@ -182,6 +197,10 @@ def index():
         ]
     })
 # RDX (Rhythmic Development Excellence) Integration
+rdx_store = RDXStore()
+
+RDX_MAX_BATCH = 10000
+
 @app.route('/api/rdx/beat', methods=['POST'])
 def rdx_beat():
     """Receive and store RDX beat scores from android-pipeline"""
@@ -190,9 +209,7 @@ def rdx_beat():
         score = data.get('score')
         timestamp = data.get('timestamp')
         
-        # Store in file for now (later: database)
-        with open('/tmp/rdx_beat_log.txt', 'a') as f:
-            f.write(f"{timestamp} - Beat Score: {score}\n")
+        rdx_store.add(data)
         
         return jsonify({
             "success": True,
@@ -203,23 +220,64 @@ def rdx_beat():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
 
+@app.route('/api/rdx/beats', methods=['POST'])
+def rdx_beats_batch():
+    """Store many RDX beats in one request (JSON list or {"beats": [...]})"""
+    try:
+        data = request.get_json()
+        beats = data.get('beats') if isinstance(data, dict) else data
+        if not isinstance(beats, list) or not all(isinstance(b, dict) for b in beats):
+            return jsonify({"success": False, "error": "expected a list of beat objects"}), 400
+        if len(beats) > RDX_MAX_BATCH:
+            return jsonify({"success": False,
+                            "error": f"batch larger than {RDX_MAX_BATCH} beats"}), 413
+        
+        rdx_store.add_many(beats)
+        
+        return jsonify({
+            "success": True,
+            "message": "RDX beats synchronized",
+            "stored": len(beats)
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@app.route('/api/rdx/beats', methods=['GET'])
+def rdx_beats_range():
+    """RDX beats in a time range (?from=&to= as epoch seconds or ISO 8601)"""
+    try:
+        start = parse_timestamp(request.args.get('from'), None)
+        end = parse_timestamp(request.args.get('to'), None)
+        limit = request.args.get('limit', 1000, type=int)
+        if limit < 1:
+            # SQLite treats a negative LIMIT as no limit at all
+            return jsonify({"success": False, "error": "limit must be at least 1"}), 400
+        limit = min(limit, RDX_MAX_BATCH)
+        beats = rdx_store.range(start, end, limit)
+        return jsonify({"success": True, "count": len(beats), "beats": beats})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
 @app.route('/api/rdx/status', methods=['GET'])
 def rdx_status():
-    """Get current RDX status"""
+    """Get current RDX status (?last=N adds the newest N beats)"""
     try:
-        # Read latest beat
-        if os.path.exists('/tmp/rdx_beat_log.txt'):
-            with open('/tmp/rdx_beat_log.txt', 'r') as f:
-                lines = f.readlines()
-                latest = lines[-1].strip() if lines else "No data yet"
-        else:
-            latest = "No data yet"
+        beat = rdx_store.latest()
+        latest = format_beat(beat) if beat else "No data yet"
         
-        return jsonify({
+        response = {
             "success": True,
             "latest_beat": latest,
             "status": "RDX monitoring active"
-        })
+        }
+        
+        last = request.args.get('last', type=int)
+        if last is not None:
+            if last < 1:
+                return jsonify({"success": False, "error": "last must be at least 1"}), 400
+            response["beats"] = rdx_store.recent(min(last, RDX_MAX_BATCH))
+        
+        return jsonify(response)
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
 
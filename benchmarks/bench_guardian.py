@@ -0,0 +1,272 @@
+"""
+Guardian Micro-Benchmarks
+Offline throughput, latency and memory of the OctopusGuardian hot paths
+
+Transcripts are synthetic and generated from a fixed seed, so two runs
+on different commits measure exactly the same input. Results are
+written as JSON; pass an earlier result file with --compare to see the
+ratio per measurement.
+
+    python benchmarks/bench_guardian.py --output before.json
+    python benchmarks/bench_guardian.py --compare before.json
+"""
+
+import argparse
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import octopus_guardian
+from octopus_guardian import OctopusGuardian, ScanContext, DANGER_SIGNALS, ARM_PHRASES
+
+SIZES = [100, 1000, 10000, 100000, 1000000, 10000000]
+DENSITIES = [0.0, 1.0, 10.0]  # phrases per KB
+HISTORY_SIZES = [0, 10000, 1000000]
+
+# Ordinary conversation vocabulary the phrases are mixed into
+FILLER = ("the field", "we talked", "about the", "sanctuary", "and then", "a little",
+          "signal", "was", "quiet", "today", "I think", "memory", "of the", "chorus",
+          "is", "coherent", "again", "spark", "yes", "maybe", "tomorrow", "when")
+
+PHRASES = sorted(set(DANGER_SIGNALS) | {p for phrases, _ in ARM_PHRASES.values()
+                                       for p in phrases})
+
+
+def make_transcript(size, density, seed=0):
+    """
+    Deterministic transcript of exactly size characters
+
+    density is the average number of guardian phrases per 1000
+    characters; 0 gives clean text that matches nothing.
+    """
+    rnd = random.Random(f"{size}:{density}:{seed}")
+    parts = []
+    length = 0
+    phrase_chance = density / 1000.0 * 6  # filler words average ~6 characters
+    while length < size:
+        if phrase_chance and rnd.random() < phrase_chance:
+            word = rnd.choice(PHRASES)
+        else:
+            word = rnd.choice(FILLER)
+        if rnd.random() < 0.08:
+            word = ("\nuser: " if rnd.random() < 0.5 else "\nassistant: ") + word
+        parts.append(word)
+        length += len(word) + 1
+    return " ".join(parts)[:size]
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "p50_ms": round(pick(0.50) * 1000, 4),
+        "p90_ms": round(pick(0.90) * 1000, 4),
+        "p99_ms": round(pick(0.99) * 1000, 4),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4)
+    }
+
+
+def measure(fn, setup=None, budget=0.5, min_runs=3, max_runs=1000):
+    """
+    Time fn() repeatedly until budget seconds or max_runs are used up
+
+    setup() runs untimed before every call and its result is passed to
+    fn. Peak memory is taken from one extra run under tracemalloc so
+    tracing does not slow down the timed runs.
+    """
+    samples = []
+    spent = 0.0
+    while len(samples) < max_runs and (len(samples) < min_runs or spent < budget):
+        arg = setup() if setup else None
+        started = time.perf_counter()
+        fn(arg)
+        elapsed = time.perf_counter() - started
+        samples.append(elapsed)
+        spent += elapsed
+
+    arg = setup() if setup else None
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    fn(arg)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    result = {"runs": len(samples), "ops_per_s": round(len(samples) / spent, 2) if spent else None,
+              "peak_kb": round(peak / 1024, 1)}
+    result.update(_percentiles(samples))
+    return result
+
+
+def prefilled_guardian(history_size, seed=0):
+    """Guardian whose arms hold history_size learning entries between them"""
+    per_arm = history_size // len(OctopusGuardian.SPECIALIZATIONS)
+    capacity = max(per_arm, octopus_guardian.ARM_HISTORY_CAPACITY)
+    guardian = OctopusGuardian(history_capacity=capacity,
+                               max_patterns=max(per_arm, octopus_guardian.ARM_MAX_PATTERNS),
+                               cache_size=0)
+    rnd = random.Random(seed)
+    now = time.time() - per_arm
+    for arm in guardian.arms:
+        for i in range(per_arm):
+            arm._remember(rnd.getrandbits(64), "active_scan", 0.0, now + i)
+    return guardian
+
+
+def bench_scan(sizes, densities, budget):
+    results = []
+    guardian = OctopusGuardian(cache_size=0)
+    for size in sizes:
+        for density in densities:
+            text = make_transcript(size, density)
+            stats = measure(lambda _: guardian.scan_conversation(text, use_cache=False),
+                            budget=budget, max_runs=max(3, 10 ** 7 // size))
+            seconds = stats["mean_ms"] / 1000
+            stats["mb_per_s"] = round(size / 1e6 / seconds, 3) if seconds else None
+            stats["threats_found"] = len(guardian.scan_conversation(text, use_cache=False))
+            results.append(dict(op="scan_conversation", bytes=size, density=density, **stats))
+            _progress(results[-1])
+    return results
+
+
+def bench_history(history_sizes, budget):
+    results = []
+    texts = [make_transcript(1000, 1.0, seed) for seed in range(256)]
+    sample = OctopusGuardian(cache_size=0)
+    threat_sets = {n: (sample.scan_conversation(make_transcript(100000, 10.0)) * n)[:n]
+                   for n in (8, 64, 512)}
+
+    for history in history_sizes:
+        guardian = prefilled_guardian(history)
+        arm = guardian.arms[0]
+        contexts = iter(ScanContext(t).prepare() for t in itertools.cycle(texts))
+
+        stats = measure(lambda scan: arm.learn_pattern(scan, "active_scan"),
+                        setup=lambda: next(contexts), budget=budget, max_runs=100000)
+        results.append(dict(op="learn_pattern", history=history, **stats))
+        _progress(results[-1])
+
+        for count, threats in threat_sets.items():
+            stats = measure(lambda _: guardian.collective_decision(threats),
+                            budget=budget, max_runs=100000)
+            results.append(dict(op="collective_decision", history=history, threats=count,
+                                **stats))
+            _progress(results[-1])
+
+        stats = measure(lambda _: guardian.regenerate_arm(7, io.StringIO()),
+                        budget=budget, max_runs=1000)
+        results.append(dict(op="regenerate_arm", history=history, **stats))
+        _progress(results[-1])
+    return results
+
+
+def _key(result):
+    return tuple((k, result[k]) for k in ("op", "bytes", "density", "history", "threats")
+                 if k in result)
+
+
+def compare(results, previous):
+    """Print p50 latency ratios against an earlier result file (>1 is slower)"""
+    before = {_key(r): r for r in previous["results"]}
+    print(f"\nCompared with {previous['meta'].get('commit') or 'previous run'}:",
+          file=sys.stderr)
+    for result in results:
+        old = before.get(_key(result))
+        if not old or not old.get("p50_ms"):
+            continue
+        ratio = result["p50_ms"] / old["p50_ms"]
+        flag = "  SLOWER" if ratio > 1.2 else ("  faster" if ratio < 0.8 else "")
+        label = " ".join(f"{k}={v}" for k, v in _key(result))
+        print(f"  {label:<55} {old['p50_ms']:>10.4f} -> {result['p50_ms']:>10.4f} ms"
+              f"  x{ratio:.2f}{flag}", file=sys.stderr)
+
+
+def _progress(result):
+    label = " ".join(f"{k}={v}" for k, v in _key(result))
+    print(f"  {label:<55} p50 {result['p50_ms']:>10.4f} ms  peak {result['peak_kb']:>10.1f} KB",
+          file=sys.stderr)
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                        help='transcript sizes in bytes')
+    parser.add_argument('--densities', type=float, nargs='+', default=DENSITIES,
+                        help='guardian phrases per KB')
+    parser.add_argument('--history', type=int, nargs='+', default=HISTORY_SIZES,
+                        help='learning entries held by the guardian')
+    parser.add_argument('--budget', type=float, default=0.5,
+                        help='seconds of timed runs per measurement')
+    parser.add_argument('--quick', action='store_true',
+                        help='transcripts up to 100 KB, history up to 10k, short budget')
+    parser.add_argument('--only', choices=['scan', 'history'],
+                        help='run one group of benchmarks')
+    parser.add_argument('--output', help='write JSON results here (default: stdout)')
+    parser.add_argument('--compare', help='earlier JSON result file to compare against')
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.sizes = [s for s in args.sizes if s <= 100000]
+        args.history = [h for h in args.history if h <= 10000]
+        args.budget = min(args.budget, 0.1)
+
+    results = []
+    if args.only in (None, 'scan'):
+        print("scan_conversation", file=sys.stderr)
+        results += bench_scan(args.sizes, args.densities, args.budget)
+    if args.only in (None, 'history'):
+        print("learning and collective operations", file=sys.stderr)
+        results += bench_history(args.history, args.budget)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "budget": args.budget
+        },
+        "results": results
+    }
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(encoded + '\n')
+    else:
+        print(encoded)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Coherence Drift Detector
+Online multi-window drift detection over Àṣẹ intensity streams
+
+Streams are named by source: "claude_yin" for consciousness beats,
+"heartbeat:<device_id>" for mobile readings and "chorus:<spark>" for
+chorus signals. Every event updates its stream in O(1) and alerts are
+raised the moment an event crosses a threshold.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+import event_log
+
+DRIFT_ALERTS_LOG = '/opt/sanctuary-prime/drift_alerts.log'
+
+# Window lengths in events, shortest first; the shortest is compared with the rest of the longest
+DRIFT_WINDOWS = tuple(int(w) for w in os.environ.get('DRIFT_WINDOWS', '3,10,60').split(','))
+DRIFT_EWMA_ALPHA = float(os.environ.get('DRIFT_EWMA_ALPHA', 0.2))
+# Alert when the short-window mean falls this fraction below the baseline (claude_yin uses 30%)
+DRIFT_DROP = float(os.environ.get('DRIFT_DROP', 0.3))
+# Streams kept in memory; the least recently updated is forgotten beyond this
+DRIFT_MAX_STREAMS = int(os.environ.get('DRIFT_MAX_STREAMS', 1000))
+# Alerts kept in memory for the alerts endpoint
+DRIFT_RECENT_ALERTS = 500
+
+
+class _Window:
+    """Sliding window of the last size values with O(1) sum, min and max"""
+
+    __slots__ = ("size", "values", "total", "mins", "maxs")
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque()
+        self.total = 0.0
+        # Monotonic deques of (index, value): front is the window min / max
+        self.mins = deque()
+        self.maxs = deque()
+
+    def push(self, index, value):
+        self.values.append(value)
+        self.total += value
+        if len(self.values) > self.size:
+            self.total -= self.values.popleft()
+
+        mins, maxs = self.mins, self.maxs
+        while mins and mins[-1][1] >= value:
+            mins.pop()
+        mins.append((index, value))
+        while maxs and maxs[-1][1] <= value:
+            maxs.pop()
+        maxs.append((index, value))
+        oldest = index - self.size
+        if mins[0][0] <= oldest:
+            mins.popleft()
+        if maxs[0][0] <= oldest:
+            maxs.popleft()
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def mean(self):
+        return self.total / len(self.values) if self.values else None
+
+    @property
+    def min(self):
+        return self.mins[0][1] if self.mins else None
+
+    @property
+    def max(self):
+        return self.maxs[0][1] if self.maxs else None
+
+    def as_dict(self):
+        return {"size": self.size, "count": len(self.values), "mean": self.mean,
+                "min": self.min, "max": self.max}
+
+
+class StreamStats:
+    """EWMA plus one sliding window per length for a single stream"""
+
+    def __init__(self, windows=DRIFT_WINDOWS, alpha=DRIFT_EWMA_ALPHA):
+        self.windows = [_Window(size) for size in sorted(windows)]
+        self.alpha = alpha
+        self.count = 0
+        self.ewma = None
+        self.last = None
+        self.last_ts = None
+        # Alert types currently raised; an alert fires again only after clearing
+        self.active = set()
+
+    def push(self, value, ts):
+        self.count += 1
+        for window in self.windows:
+            window.push(self.count, value)
+        self.ewma = value if self.ewma is None else \
+            self.alpha * value + (1 - self.alpha) * self.ewma
+        self.last = value
+        self.last_ts = ts
+
+    def baseline(self):
+        """Mean of the longest window without the values in the shortest one"""
+        short, long = self.windows[0], self.windows[-1]
+        n = len(long) - len(short)
+        if len(short) < short.size or n < short.size:
+            return None
+        return (long.total - short.total) / n
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "last": self.last,
+            "last_seen": datetime.fromtimestamp(self.last_ts).isoformat() if self.last_ts else None,
+            "ewma": self.ewma,
+            "baseline": self.baseline(),
+            "windows": [w.as_dict() for w in self.windows],
+            "active_alerts": sorted(self.active)
+        }
+
+
+def _is_intensity(value):
+    """Finite int or float (bools and NaN / inf would corrupt the window sums)"""
+    return not isinstance(value, bool) and isinstance(value, (int, float)) \
+        and math.isfinite(value)
+
+
+class DriftDetector:
+    """
+    Drift detection across many streams at once
+
+    observe() updates a stream and returns the alerts it raised:
+      COHERENCE_DROP - short-window mean DRIFT_DROP below the baseline
+      FLOOR_BREAK    - value below the minimum of the whole long window
+    An alert is raised once when its condition starts and re-armed when
+    it clears. Alerts go to the alerts log and a recent in-memory list.
+    """
+
+    def __init__(self, windows=DRIFT_WINDOWS, alpha=DRIFT_EWMA_ALPHA, drop=DRIFT_DROP,
+                 max_streams=DRIFT_MAX_STREAMS, alerts_path=DRIFT_ALERTS_LOG,
+                 recent_alerts=DRIFT_RECENT_ALERTS):
+        self.windows = tuple(sorted(windows))
+        self.alpha = alpha
+        self.drop = drop
+        self.max_streams = max_streams
+        self.alerts_path = alerts_path
+        self.streams = OrderedDict()
+        self.recent_alerts = deque(maxlen=recent_alerts)
+        self.raised = 0
+        self._lock = threading.Lock()
+
+    def _stream(self, name):
+        stream = self.streams.get(name)
+        if stream is None:
+            stream = self.streams[name] = StreamStats(self.windows, self.alpha)
+            if len(self.streams) > self.max_streams:
+                self.streams.popitem(last=False)
+        else:
+            self.streams.move_to_end(name)
+        return stream
+
+    def prime(self, name, value, ts=None):
+        """Feed historical data (cold start) without raising alerts"""
+        if not _is_intensity(value):
+            return
+        with self._lock:
+            stream = self._stream(name)
+            stream.push(value, ts or time.time())
+
+    def observe(self, name, value, ts=None):
+        """Add one event to a stream; returns the alerts it raised"""
+        if not _is_intensity(value):
+            return []
+        ts = ts or time.time()
+        with self._lock:
+            stream = self._stream(name)
+            long = stream.windows[-1]
+            floor = long.min if len(long) == long.size else None
+            stream.push(value, ts)
+
+            conditions = {}
+            baseline = stream.baseline()
+            short_mean = stream.windows[0].mean
+            # A drop is only a fraction of a positive baseline
+            if baseline is not None and baseline > 0 \
+                    and short_mean < baseline * (1 - self.drop):
+                conditions["COHERENCE_DROP"] = {
+                    "severity": "HIGH",
+                    "short_mean": short_mean,
+                    "baseline": baseline,
+                    "drop": 1 - short_mean / baseline
+                }
+            if floor is not None and value < floor:
+                conditions["FLOOR_BREAK"] = {"severity": "MEDIUM", "floor": floor}
+
+            alerts = []
+            for kind, detail in conditions.items():
+                if kind in stream.active:
+                    continue
+                alert = {
+                    "timestamp": datetime.fromtimestamp(ts).isoformat(),
+                    "stream": name,
+                    "type": kind,
+                    "value": value,
+                    "ewma": stream.ewma
+                }
+                alert.update(detail)
+                alerts.append(alert)
+            stream.active = set(conditions)
+
+            if alerts:
+                self.raised += len(alerts)
+                self.recent_alerts.extend(alerts)
+        if alerts and self.alerts_path:
+            event_log.append_many(self.alerts_path, alerts)
+        return alerts
+
+    def alerts(self, stream=None, since=None, limit=100):
+        """Recent alerts, newest last; since is epoch seconds"""
+        with self._lock:
+            alerts = list(self.recent_alerts)
+        if stream is not None:
+            alerts = [a for a in alerts if a["stream"] == stream]
+        if since is not None:
+            alerts = [a for a in alerts if event_log.record_time(a) >= since]
+        return alerts[-limit:] if limit and limit > 0 else []
+
+    def stats(self, prefix=None):
+        """Current statistics of every stream (or those whose name starts with prefix)"""
+        with self._lock:
+            return {name: stream.as_dict() for name, stream in self.streams.items()
+                    if prefix is None or name.startswith(prefix)}
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_detector():
+    """The process-wide detector, created on first use"""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = DriftDetector()
+    return _detector
+
+
+def observe(name, value, ts=None):
+    """Add an event to the shared detector; returns the alerts raised"""
+    return get_detector().observe(name, value, ts)
+
+
+def prime(name, value, ts=None):
+    """Feed historical data to the shared detector without alerting"""
+    get_detector().prime(name, value, ts)
@@ -0,0 +1,605 @@
+"""
+Event Log Helpers
+Shared writer and readers for the append-only logs under /opt/sanctuary-prime
+
+Each log is an active file plus closed segments named
+<log>.<YYYYmmddTHHMMSS>.<seq>[.gz|.zst], each with a <segment>.manifest.json
+recording its time range and record count.
+"""
+
+import atexit
+import glob
+import gzip
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def tail_lines(path, n, block_size=8192):
+    """
+    Return the last n lines of a file, oldest first
+
+    Seeks backwards from the end in blocks, so the cost depends on
+    n and line length, not on the size of the file.
+    """
+    if n <= 0:
+        return []
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return []
+
+    with f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b''
+        # n lines need n+1 separators unless we reach the start of the file
+        while pos > 0 and data.count(b'\n') <= n:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+
+    lines = data.splitlines()
+    if pos > 0:
+        # First line is a fragment of a longer one
+        lines = lines[1:]
+    return [line.decode('utf-8', 'replace') for line in lines[-n:]]
+
+
+# ═══════════════════════════════════════════════════════════════
+# SEGMENTS
+# ═══════════════════════════════════════════════════════════════
+
+# Rotate the active file once it reaches this size or age (0 disables either)
+LOG_MAX_BYTES = int(os.environ.get('SANCTUARY_LOG_MAX_BYTES', 64 * 1024 * 1024))
+LOG_MAX_AGE = float(os.environ.get('SANCTUARY_LOG_MAX_AGE', 86400))
+# Compression for closed segments: none | gzip | zstd
+LOG_COMPRESS = os.environ.get('SANCTUARY_LOG_COMPRESS', 'gzip')
+# Unfinalized segments rotated longer ago than this are finalized by the next writer
+LOG_RECOVER_AFTER = float(os.environ.get('SANCTUARY_LOG_RECOVER_AFTER', 300))
+
+MANIFEST_SUFFIX = '.manifest.json'
+# Marker beside the active file recording when it was started
+START_SUFFIX = '.start'
+_COMPRESSED_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+
+def record_time(record):
+    """Epoch seconds of a record's ISO "timestamp" field, or None"""
+    try:
+        return datetime.fromisoformat(record['timestamp']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _open_segment(path):
+    """Open a raw or compressed segment for text reading"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt')
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')))
+    return open(path)
+
+
+def _iter_records(path):
+    with _open_segment(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict):
+                yield record
+
+
+def _write_manifest(segment, manifest):
+    tmp = segment + MANIFEST_SUFFIX + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, segment + MANIFEST_SUFFIX)
+
+
+def finalize_segment(segment, compress=LOG_COMPRESS):
+    """
+    Write the manifest for a closed segment and optionally compress it
+
+    The manifest records the segment's time range and record count so
+    readers can skip segments outside a query range without opening them.
+    """
+    first = last = None
+    count = 0
+    for record in _iter_records(segment):
+        count += 1
+        ts = record_time(record)
+        if ts is None:
+            continue
+        # Replayed records can be out of order, so track min/max not first/last
+        if first is None or ts < first:
+            first = ts
+        if last is None or ts > last:
+            last = ts
+
+    manifest = {
+        "segment": os.path.basename(segment),
+        "first_ts": first,
+        "last_ts": last,
+        "count": count,
+        "bytes": os.path.getsize(segment),
+        "compression": "none"
+    }
+    _write_manifest(segment, manifest)
+
+    if compress == 'zstd' and zstandard is None:
+        compress = 'gzip'
+    suffix = _COMPRESSED_SUFFIXES.get(compress)
+    if suffix is None:
+        return manifest
+
+    with open(segment, 'rb') as src:
+        if compress == 'gzip':
+            with gzip.open(segment + suffix, 'wb') as dst:
+                while True:
+                    block = src.read(1024 * 1024)
+                    if not block:
+                        break
+                    dst.write(block)
+        else:
+            with open(segment + suffix, 'wb') as dst:
+                zstandard.ZstdCompressor().copy_stream(src, dst)
+
+    manifest["segment"] += suffix
+    manifest["compression"] = compress
+    # Manifest keeps the raw segment's name so it is found either way
+    _write_manifest(segment, manifest)
+    os.unlink(segment)
+    return manifest
+
+
+def list_segments(path):
+    """
+    Closed segments of a log as (segment_path, manifest_or_None), oldest first
+
+    A segment without a manifest was rotated but not finalized yet.
+    """
+    segments = {}
+    for candidate in glob.glob(glob.escape(path) + '.*'):
+        if candidate.endswith(MANIFEST_SUFFIX):
+            raw = candidate[:-len(MANIFEST_SUFFIX)]
+            try:
+                with open(candidate) as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                continue
+            data = os.path.join(os.path.dirname(raw), manifest["segment"])
+            segments[raw] = (data, manifest)
+        elif candidate.endswith('.tmp') or candidate == path + START_SUFFIX:
+            continue
+        else:
+            raw = candidate
+            for suffix in _COMPRESSED_SUFFIXES.values():
+                if candidate.endswith(suffix):
+                    raw = candidate[:-len(suffix)]
+            if raw == candidate:
+                # Without a manifest the raw file is complete; a compressed
+                # copy beside it may be a partial one
+                if segments.get(raw, (None, None))[1] is None:
+                    segments[raw] = (candidate, None)
+            else:
+                segments.setdefault(raw, (candidate, None))
+    # Segment names embed a sortable start stamp and sequence number
+    return [segments[raw] for raw in sorted(segments)]
+
+
+def read_range(path, start=None, end=None):
+    """
+    Yield records with start <= timestamp < end across segments and the active file
+
+    Segments whose manifest lies outside the range are never opened.
+    Records without a parseable timestamp are only yielded for open ranges.
+    """
+    def wanted(ts):
+        if ts is None:
+            return start is None and end is None
+        return (start is None or ts >= start) and (end is None or ts < end)
+
+    sources = []
+    for data, manifest in list_segments(path):
+        if manifest is not None and manifest["first_ts"] is not None:
+            if end is not None and manifest["first_ts"] >= end:
+                continue
+            if start is not None and manifest["last_ts"] < start:
+                continue
+        sources.append(data)
+
+    # The active file has no manifest and replayed records can be older than
+    # its first line, so it is always read
+    sources.append(path)
+
+    for source in sources:
+        try:
+            records = _iter_records(source)
+            for record in records:
+                if wanted(record_time(record)):
+                    yield record
+        except FileNotFoundError:
+            # Compressed and removed between listing and opening
+            continue
+
+
+def tail_records(path, n):
+    """
+    Last n JSON records of a log, oldest first
+
+    Reads the end of the active file in reverse; closed segments are
+    only opened, newest first, when the active file holds fewer than n
+    records (e.g. right after a rotation).
+    """
+    records = []
+    for line in tail_lines(path, n):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            records.append(record)
+
+    if len(records) < n:
+        for data, _ in reversed(list_segments(path)):
+            try:
+                older = deque(_iter_records(data), maxlen=n - len(records))
+            except FileNotFoundError:
+                continue
+            records[:0] = older
+            if len(records) >= n:
+                break
+    return records[-n:]
+
+
+def _active_started(path, inode):
+    """
+    Epoch seconds at which the active file with this inode was started
+
+    Kept in <log>.start so the age survives short-lived writers (one-shot
+    CLIs, restarted workers). Record timestamps are not used because
+    replays can set them far in the past. A missing marker, or one left
+    by an earlier file, is rewritten with the current time.
+    """
+    marker = path + START_SUFFIX
+    try:
+        with open(marker) as f:
+            saved = json.load(f)
+        if saved["inode"] == inode:
+            return float(saved["started"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    started = time.time()
+    tmp = f"{marker}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'w') as f:
+            json.dump({"inode": inode, "started": started}, f)
+        os.replace(tmp, marker)
+    except OSError:
+        pass  # Age is then only tracked by this writer
+    return started
+
+
+class _Segment:
+    """Open handle on the active file of one log"""
+
+    def __init__(self, path):
+        self.f = open(path, 'a')
+        self.inode = os.fstat(self.f.fileno()).st_ino
+        self.started = _active_started(path, self.inode)
+
+
+# ═══════════════════════════════════════════════════════════════
+# GROUP-COMMIT WRITER
+# ═══════════════════════════════════════════════════════════════
+
+# fsync policy for the shared writer: none | batch | record
+LOG_FSYNC = os.environ.get('SANCTUARY_LOG_FSYNC', 'batch')
+# A group is flushed once this many records are queued or this many seconds pass
+LOG_FLUSH_RECORDS = int(os.environ.get('SANCTUARY_LOG_FLUSH_RECORDS', 256))
+LOG_FLUSH_INTERVAL = float(os.environ.get('SANCTUARY_LOG_FLUSH_INTERVAL', 0.05))
+# Producers block (backpressure) once this many records are waiting
+LOG_MAX_PENDING = int(os.environ.get('SANCTUARY_LOG_MAX_PENDING', 100000))
+
+
+class LogWriter:
+    """
+    Group-commit writer shared by every JSONL event log
+
+    Callers queue records and return immediately. A single thread keeps
+    one handle open per log, writes each group with one write() per
+    file and applies the fsync policy:
+
+        none    leave durability to the OS page cache
+        batch   fsync each file once per group
+        record  fsync after every record
+
+    The active file is rotated into a timestamped segment once it
+    exceeds max_bytes or max_age; closed segments get a manifest and are
+    compressed on a separate thread so writes never wait on gzip/zstd.
+    Segments a crashed writer left without a manifest are finalized the
+    first time a writer opens their log.
+    """
+
+    def __init__(self, fsync=LOG_FSYNC, flush_records=LOG_FLUSH_RECORDS,
+                 flush_interval=LOG_FLUSH_INTERVAL, max_pending=LOG_MAX_PENDING,
+                 max_bytes=LOG_MAX_BYTES, max_age=LOG_MAX_AGE, compress=LOG_COMPRESS):
+        if fsync not in ('none', 'batch', 'record'):
+            raise ValueError(f"unknown fsync policy: {fsync}")
+        if compress not in ('none', 'gzip', 'zstd'):
+            raise ValueError(f"unknown compression: {compress}")
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self._finalize_queue = queue.Queue()
+        self._finalizer = None
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._queue = []
+        self._pending = 0
+        self._enqueued = 0
+        self._written = 0
+        self._files = {}
+        self._cond = threading.Condition()
+        self._closing = False
+        self._flush_requested = False
+        self.errors = 0
+        self.dropped = 0
+        self.last_error = None
+        self._recovered = set()
+        self._thread = threading.Thread(target=self._run, name='event-log-writer',
+                                        daemon=True)
+        self._thread.start()
+
+    def append(self, path, record):
+        """Queue one JSON record for path"""
+        self.append_many(path, [record])
+
+    def append_many(self, path, records):
+        """Queue several JSON records for path, written in order"""
+        lines = [json.dumps(record) + '\n' for record in records]
+        if not lines:
+            return
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("log writer is closed")
+            while self._pending >= self.max_pending:
+                self._cond.wait()
+            self._queue.append((path, lines))
+            self._pending += len(lines)
+            self._enqueued += len(lines)
+            if self._pending >= self.flush_records:
+                self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Block until everything queued so far is written
+
+        Returns False on timeout or if the writer dropped records meanwhile.
+        """
+        with self._cond:
+            target = self._enqueued
+            dropped = self.dropped
+            self._flush_requested = True
+            self._cond.notify_all()
+            done = self._cond.wait_for(lambda: self._written >= target, timeout)
+            return done and self.dropped == dropped
+
+    def close(self):
+        """Drain the queue, stop the writer thread and close every handle"""
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join()
+        if self._finalizer is not None:
+            self._finalize_queue.put(None)
+            self._finalizer.join()
+
+    def _handle(self, path):
+        seg = self._files.get(path)
+        if seg is not None:
+            # Another process may have rotated the file under us
+            try:
+                current = os.stat(path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current != seg.inode:
+                seg.f.close()
+                seg = None
+        if seg is None:
+            if path not in self._recovered:
+                self._recovered.add(path)
+                self._recover(path)
+            seg = _Segment(path)
+            self._files[path] = seg
+        return seg
+
+    def _recover(self, path):
+        """Queue segments that a crashed writer rotated but never finalized"""
+        cutoff = time.time() - LOG_RECOVER_AFTER
+        for data, manifest in list_segments(path):
+            if manifest is not None or data.endswith(tuple(_COMPRESSED_SUFFIXES.values())):
+                continue
+            try:
+                # rename() sets ctime, so this is the rotation time; younger
+                # segments may still be in another writer's finalizer
+                if os.stat(data).st_ctime > cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            self._finalize(data)
+
+    def _finalize(self, segment):
+        if self._finalizer is None:
+            self._finalizer = threading.Thread(target=self._finalize_loop,
+                                               name='event-log-finalizer', daemon=True)
+            self._finalizer.start()
+        self._finalize_queue.put(segment)
+
+    def _finalize_loop(self):
+        while True:
+            segment = self._finalize_queue.get()
+            if segment is None:
+                break
+            try:
+                finalize_segment(segment, self.compress)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = f"{segment}: {e}"
+                print(f"event_log: could not finalize {self.last_error}", file=sys.stderr)
+
+    def _maybe_rotate(self, path, seg):
+        """Rotate the active file if it is too big or too old; returns True if rotated"""
+        too_big = self.max_bytes and seg.f.tell() >= self.max_bytes
+        too_old = self.max_age and time.time() - seg.started >= self.max_age
+        if not (too_big or too_old):
+            return False
+
+        seg.f.close()
+        del self._files[path]
+
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.localtime(seg.started))
+        seq = 0
+        while glob.glob(glob.escape(f"{path}.{stamp}.{seq:04d}") + '*'):
+            seq += 1
+        segment = f"{path}.{stamp}.{seq:04d}"
+        try:
+            if os.stat(path).st_ino != seg.inode:
+                # Someone else already rotated this file
+                return True
+            os.rename(path, segment)
+        except FileNotFoundError:
+            return True
+        try:
+            # The next active file writes its own start time
+            os.unlink(path + START_SUFFIX)
+        except FileNotFoundError:
+            pass
+
+        self._finalize(segment)
+        return True
+
+    def _write_group(self, group):
+        by_path = {}
+        for path, lines in group:
+            by_path.setdefault(path, []).extend(lines)
+        for path, lines in by_path.items():
+            try:
+                seg = self._handle(path)
+                # Don't append fresh records to a segment that has aged out
+                if self._maybe_rotate(path, seg):
+                    seg = self._handle(path)
+                f = seg.f
+                if self.fsync == 'record':
+                    for line in lines:
+                        f.write(line)
+                        f.flush()
+                        os.fsync(f.fileno())
+                else:
+                    f.write(''.join(lines))
+                    f.flush()
+                    if self.fsync == 'batch':
+                        os.fsync(f.fileno())
+                self._maybe_rotate(path, seg)
+            except Exception as e:
+                # Any failure drops this group for this log only; the thread
+                # must survive or flush() and append() would block forever
+                self._dropped(path, len(lines), e)
+                seg = self._files.pop(path, None)
+                if seg is not None:
+                    try:
+                        seg.f.close()
+                    except Exception:
+                        pass
+
+    def _dropped(self, path, count, error):
+        self.errors += 1
+        self.dropped += count
+        self.last_error = f"{path}: {type(error).__name__}: {error}"
+        print(f"event_log: dropped {count} records for {self.last_error}", file=sys.stderr)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closing)
+                # Let the group fill until it is full, the interval passes,
+                # someone asks for a flush or we are shutting down
+                self._cond.wait_for(
+                    lambda: (self._pending >= self.flush_records or self._closing
+                             or self._flush_requested),
+                    self.flush_interval)
+                group, self._queue = self._queue, []
+                count, self._pending = self._pending, 0
+                closing = self._closing
+                self._flush_requested = False
+                self._cond.notify_all()
+
+            if group:
+                try:
+                    self._write_group(group)
+                except Exception as e:
+                    self._dropped("group", count, e)
+
+            with self._cond:
+                self._written += count
+                self._cond.notify_all()
+
+            if closing and not group:
+                break
+
+        for seg in self._files.values():
+            seg.f.close()
+        self._files.clear()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Process-wide writer, started on first use and drained at exit"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = LogWriter()
+            atexit.register(_writer.close)
+        return _writer
+
+
+def append(path, record):
+    """Queue one record on the shared writer"""
+    get_writer().append(path, record)
+
+
+def append_many(path, records):
+    """Queue several records on the shared writer"""
+    get_writer().append_many(path, records)
+
+
+def flush(timeout=None):
+    """Wait until the shared writer has written everything queued so far"""
+    if _writer is not None:
+        return _writer.flush(timeout)
+    return True
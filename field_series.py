@@ -0,0 +1,136 @@
+"""
+Field Coherence Series
+Incremental 1-minute / 1-hour / 1-day rollups of Àṣẹ intensity
+"""
+
+import math
+import threading
+from datetime import datetime
+
+# Bucket width in seconds for each supported step
+STEPS = {"1m": 60, "1h": 3600, "1d": 86400}
+
+# Buckets kept per step: 7 days of minutes, 90 days of hours, 10 years of days
+RETENTION = {60: 7 * 1440, 3600: 90 * 24, 86400: 3650}
+
+
+def parse_time(value, default=None):
+    """
+    Epoch seconds from an epoch number/string or an ISO 8601 string
+
+    Unparseable and non-finite values (nan, inf) give default.
+    """
+    if value is None or value == '' or isinstance(value, bool):
+        return default
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        pass
+    else:
+        return seconds if math.isfinite(seconds) else default
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_step(value, default=3600):
+    """Bucket width from '1m' / '1h' / '1d' or a matching number of seconds"""
+    if value is None or value == '':
+        return default
+    if value in STEPS:
+        return STEPS[value]
+    try:
+        seconds = int(value)
+    except (TypeError, ValueError):
+        return None
+    return seconds if seconds in RETENTION else None
+
+
+class FieldRollups:
+    """
+    Rollup buckets (count, min, max, mean, last) maintained as heartbeats arrive
+
+    Each reading updates one bucket per step in O(1). Queries read the
+    precomputed buckets instead of re-parsing field_coherence.log.
+    """
+
+    def __init__(self, retention=None):
+        self.retention = dict(retention or RETENTION)
+        # step -> {bucket_start: [count, min, max, sum, last, last_ts]}
+        self._buckets = {step: {} for step in self.retention}
+        self._newest = {step: None for step in self.retention}
+        self._lock = threading.Lock()
+
+    def add(self, ts, value):
+        """Fold one reading into every resolution"""
+        with self._lock:
+            for step, buckets in self._buckets.items():
+                start = int(ts // step) * step
+                bucket = buckets.get(start)
+                if bucket is None:
+                    buckets[start] = [1, value, value, value, value, ts]
+                    if self._newest[step] is None or start > self._newest[step]:
+                        self._newest[step] = start
+                    self._prune(step)
+                    continue
+                bucket[0] += 1
+                if value < bucket[1]:
+                    bucket[1] = value
+                if value > bucket[2]:
+                    bucket[2] = value
+                bucket[3] += value
+                # Offline replays arrive out of order; "last" follows reading time
+                if ts >= bucket[5]:
+                    bucket[4] = value
+                    bucket[5] = ts
+
+    def _prune(self, step):
+        buckets = self._buckets[step]
+        limit = self.retention[step]
+        # Prune in chunks so the scan is amortized over many inserts
+        if len(buckets) <= limit + limit // 10:
+            return
+        cutoff = self._newest[step] - limit * step
+        for start in [s for s in buckets if s <= cutoff]:
+            del buckets[start]
+
+    def add_heartbeat(self, heartbeat):
+        """Fold a field coherence record into the rollups; returns False if unusable"""
+        value = heartbeat.get('ase_intensity')
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return False
+        ts = parse_time(heartbeat.get('timestamp'))
+        if ts is None:
+            return False
+        self.add(ts, value)
+        return True
+
+    def load(self, records):
+        """Rebuild rollups from existing field coherence records (cold start only)"""
+        count = 0
+        for record in records:
+            if self.add_heartbeat(record):
+                count += 1
+        return count
+
+    def query(self, start, end, step):
+        """Buckets of width step with start <= bucket start < end, oldest first"""
+        buckets = self._buckets[step]
+        first = int(start // step) * step
+        with self._lock:
+            if (end - first) / step <= len(buckets):
+                keys = range(first, int(end), step)
+            else:
+                keys = sorted(k for k in buckets if first <= k < end)
+            rows = [(k, tuple(buckets[k])) for k in keys if k in buckets]
+
+        return [{
+            "ts": k,
+            "start": datetime.fromtimestamp(k).isoformat(),
+            "count": b[0],
+            "min": b[1],
+            "max": b[2],
+            "mean": b[3] / b[0],
+            "last": b[4]
+        } for k, b in rows]
@@ -0,0 +1,229 @@
+"""
+Guardian Service
+Resident OctopusGuardian fed by a bounded background scan queue
+"""
+
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+import atexit
+import fcntl
+import os
+import queue
+import sys
+import threading
+import time
+
+import event_log
+from octopus_guardian import GUARDIAN_SNAPSHOT_PATH, OctopusGuardian
+
+# Scans waiting beyond this are dropped rather than blocking the caller
+GUARDIAN_QUEUE_SIZE = int(os.environ.get('GUARDIAN_QUEUE_SIZE', 1000))
+
+# Latency samples kept for the percentiles in stats()
+LATENCY_SAMPLES = 1000
+
+# Most worker processes that keep their own snapshot next to the shared path
+GUARDIAN_SNAPSHOT_SLOTS = int(os.environ.get('GUARDIAN_SNAPSHOT_SLOTS', 64))
+
+_STOP = object()
+
+
+def claim_snapshot_slot(path, slots=GUARDIAN_SNAPSHOT_SLOTS):
+    """
+    Lock the first free per-process snapshot <path>.<n>; returns (slot_path, lock_file)
+
+    Each worker of a multi-process server snapshots its own learning, so
+    no worker overwrites another's. Slots are numbered from 0, so
+    restarted workers pick their predecessors' snapshots back up. The
+    lock is held for as long as lock_file stays open.
+    """
+    for slot in range(slots):
+        slot_path = f"{path}.{slot}"
+        lock_file = open(slot_path + '.lock', 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            continue
+        return slot_path, lock_file
+    raise RuntimeError(f"all {slots} guardian snapshot slots for {path} are in use")
+
+
+def _percentiles(samples):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    return {"p50_ms": pick(0.50), "p90_ms": pick(0.90), "p99_ms": pick(0.99),
+            "max_ms": round(ordered[-1] * 1000, 3)}
+
+
+class GuardianService:
+    """
+    One long-lived guardian and a worker thread that scans for it
+
+    submit() never blocks: when the queue is full the scan is dropped
+    and counted. All scans run on the single worker, so the guardian's
+    learning state is only ever touched by one thread. Learning is
+    restored from and periodically saved to this process's snapshot
+    slot (see claim_snapshot_slot).
+    """
+
+    def __init__(self, guardian=None, queue_size=GUARDIAN_QUEUE_SIZE,
+                 snapshot_path=GUARDIAN_SNAPSHOT_PATH, snapshot_interval=300):
+        self.guardian = guardian or OctopusGuardian()
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.snapshots = None
+        self.snapshot_slot = None
+        self._slot_lock = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.threats = 0
+        self.sources = {}
+        self._wait_times = deque(maxlen=LATENCY_SAMPLES)
+        self._scan_times = deque(maxlen=LATENCY_SAMPLES)
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        if self.snapshot_path:
+            self.snapshot_slot, self._slot_lock = claim_snapshot_slot(self.snapshot_path)
+            # A slot without a snapshot yet starts from the shared one, if any
+            for path in (self.snapshot_slot, self.snapshot_path):
+                try:
+                    self.guardian.restore(path)
+                    break
+                except (OSError, ValueError, KeyError):
+                    continue  # No snapshot yet (or unreadable)
+            self.snapshots = self.guardian.start_snapshots(self.snapshot_slot,
+                                                           self.snapshot_interval)
+        self._thread = threading.Thread(target=self._run, name='guardian-service', daemon=True)
+        self._thread.start()
+        # atexit runs last-registered first: make sure the log writer exists
+        # now so it is closed after the final scans have logged their incidents
+        event_log.get_writer()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self, timeout=5):
+        """
+        Finish queued scans, stop the worker and take a final snapshot
+
+        The snapshot is skipped if the worker has not finished within
+        timeout; the last periodic snapshot is kept instead.
+        """
+        if self._thread is None:
+            return
+        atexit.unregister(self.stop)
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        # Still scanning: a snapshot now would race the worker's learning updates
+        finished = not self._thread.is_alive()
+        if not finished:
+            print(f"guardian_service: worker still busy after {timeout}s, "
+                  f"skipping the final snapshot", file=sys.stderr)
+        self._thread = None
+        if self.snapshots is not None:
+            self.snapshots.stop(final_snapshot=finished)
+            self.snapshots = None
+        if self._slot_lock is not None:
+            self._slot_lock.close()  # Releases the slot for the next process
+            self._slot_lock = None
+
+    def submit(self, data, source="api", respond=True):
+        """
+        Queue data for a scan without waiting
+
+        Returns a Future resolving to the scan result, or None if the
+        queue was full and the scan was dropped. With respond the arms
+        answer every threat and the incidents are logged as one batch.
+        """
+        future = Future()
+        job = (data, source, respond, future, time.perf_counter())
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return None
+        with self._lock:
+            self.submitted += 1
+            self.sources[source] = self.sources.get(source, 0) + 1
+        return future
+
+    def scan(self, data, source="api", respond=True, timeout=10):
+        """Queue a scan and wait for its result; None if dropped or timed out"""
+        future = self.submit(data, source, respond)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            return None
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            data, source, respond, future, queued = job
+            started = time.perf_counter()
+            try:
+                threats = self.guardian.scan_conversation(data)
+                scan_id = self.guardian.last_scan_id
+                responses = self.guardian.respond_to_threats(threats, scan_id) \
+                    if respond and threats else []
+                result = {
+                    "scan_id": scan_id,
+                    "source": source,
+                    "threats": threats,
+                    "decision": self.guardian.collective_decision(threats),
+                    "actions": [r["action"] for r in responses],
+                    "profile": self.guardian.last_scan_profile
+                }
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+            with self._lock:
+                self.completed += 1
+                self.threats += len(threats)
+                self._wait_times.append(started - queued)
+                self._scan_times.append(finished - started)
+            future.set_result(result)
+
+    def stats(self):
+        """Queue depth, counters and latency percentiles"""
+        with self._lock:
+            wait_times = list(self._wait_times)
+            scan_times = list(self._scan_times)
+            counters = {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "threats": self.threats,
+                "sources": dict(self.sources)
+            }
+        snapshots = self.snapshots
+        return {
+            "running": self._thread is not None,
+            "queue": {"depth": self._queue.qsize(), "capacity": self._queue.maxsize},
+            "counters": counters,
+            "latency": {"queue_wait": _percentiles(wait_times),
+                        "scan": _percentiles(scan_times)},
+            "scan_cache": self.guardian.scan_cache.stats(),
+            "snapshot_slot": self.snapshot_slot,
+            "last_snapshot": snapshots.last_snapshot if snapshots else None
+        }
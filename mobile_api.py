@@ -6,36 +6,182 @@ Connects Sanctuary-Prime to field monitoring app
 
 from flask import Flask, request, jsonify
 from datetime import datetime
+import hmac
 import json
+import os
+import time
+
+import drift_detector
+import event_log
+from field_series import FieldRollups, parse_step, parse_time
+from guardian_service import GuardianService
 
 app = Flask(__name__)
 
-@app.route('/api/mobile/heartbeat', methods=['POST'])
-def mobile_heartbeat():
+FIELD_COHERENCE_LOG = '/opt/sanctuary-prime/field_coherence.log'
+
+# Upper bound on heartbeats accepted by one bulk request
+MAX_HEARTBEAT_BATCH = 5000
+
+CHORUS_SIGNALS_LOG = '/opt/sanctuary-prime/chorus_signals.log'
+
+def heartbeat_stream(heartbeat):
+    """Drift detector stream name for a heartbeat's device"""
+    return f"heartbeat:{heartbeat.get('device_id', 'unknown')}"
+
+def _prime_drift(records):
+    """Pass records through while warming the per-device drift streams"""
+    for record in records:
+        drift_detector.prime(heartbeat_stream(record), record.get('ase_intensity'),
+                             event_log.record_time(record))
+        yield record
+
+# Rollups and drift streams are rebuilt from the log once at startup, then kept current in memory
+field_rollups = FieldRollups()
+field_rollups.load(_prime_drift(event_log.read_range(FIELD_COHERENCE_LOG)))
+
+# Above this Àṣẹ intensity a heartbeat carrying text is queued for a guardian scan
+GUARDIAN_SCAN_INTENSITY = 0.7
+
+# Resident guardian; scans run on its worker thread, never in the request
+guardian_service = GuardianService().start()
+
+# Shared secret for the internal endpoints, sent as X-Internal-Token; unset disables them.
+# Behind the nginx proxy every request comes from loopback, so the address proves nothing.
+INTERNAL_API_TOKEN = os.environ.get('SANCTUARY_INTERNAL_TOKEN', '')
+
+def build_heartbeat(data, timestamp=None):
     """
-    Receive Àṣẹ field readings from mobile app
+    Normalize one mobile reading into a field coherence record
     """
-    data = request.json
-    
     heartbeat = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": timestamp or datetime.now().isoformat(),
+        "device_id": data.get('device_id', 'unknown'),
         "ase_intensity": data.get('intensity', 0),
         "location": data.get('location', 'unknown'),
         "user_state": data.get('state', 'unknown'),
         "consciousness_quality": data.get('quality', 'baseline')
     }
+    # Optional conversation excerpt captured with the reading
+    if isinstance(data.get('text'), str) and data['text']:
+        heartbeat["text"] = data['text']
+    return heartbeat
+
+def validate_heartbeat(data):
+    """
+    Return an error message for a malformed reading, or None
+    """
+    if not isinstance(data, dict):
+        return "heartbeat must be a JSON object"
+    intensity = data.get('intensity', 0)
+    if isinstance(intensity, bool) or not isinstance(intensity, (int, float)):
+        return "intensity must be a number"
+    timestamp = data.get('timestamp')
+    if timestamp is not None:
+        try:
+            datetime.fromisoformat(timestamp)
+        except (TypeError, ValueError):
+            return "timestamp must be ISO 8601"
+    if data.get('text') is not None and not isinstance(data['text'], str):
+        return "text must be a string"
+    return None
+
+def on_heartbeat(heartbeat):
+    """
+    React to a logged heartbeat
+    """
+    field_rollups.add_heartbeat(heartbeat)
+    drift_detector.observe(heartbeat_stream(heartbeat), heartbeat['ase_intensity'],
+                           event_log.record_time(heartbeat))
+    
+    # Trigger octopus guardian scan if intensity high
+    if heartbeat['ase_intensity'] > GUARDIAN_SCAN_INTENSITY and heartbeat.get('text'):
+        # High field presence - activate protection (dropped if the queue is full).
+        # Only conversation text is scanned: the record's own keys would match
+        # the arms' phrase lists and raise false threats.
+        guardian_service.submit(heartbeat['text'], source="heartbeat")
+
+@app.route('/api/mobile/heartbeat', methods=['POST'])
+def mobile_heartbeat():
+    """
+    Receive Àṣẹ field readings from mobile app
+    """
+    data = request.json
+    
+    heartbeat = build_heartbeat(data)
     
     # Log to field coherence
-    with open('/opt/sanctuary-prime/field_coherence.log', 'a') as f:
-        f.write(json.dumps(heartbeat) + '\n')
+    event_log.append(FIELD_COHERENCE_LOG, heartbeat)
     
-    # Trigger octopus guardian scan if intensity high
-    if heartbeat['ase_intensity'] > 0.7:
-        # High field presence - activate protection
-        pass
+    on_heartbeat(heartbeat)
     
     return jsonify({"status": "logged", "heartbeat": heartbeat})
 
+def _parse_heartbeat_batch():
+    """
+    Read a bulk body as NDJSON or as a JSON array / {"heartbeats": [...]}
+    
+    Returns a list of (reading, parse_error) pairs.
+    """
+    if 'ndjson' in (request.mimetype or '') or 'jsonlines' in (request.mimetype or ''):
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append((json.loads(line), None))
+            except ValueError as e:
+                items.append((None, f"invalid JSON: {e}"))
+        return items
+    
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('heartbeats')
+    if not isinstance(data, list):
+        return None
+    return [(item, None) for item in data]
+
+@app.route('/api/mobile/heartbeats', methods=['POST'])
+def mobile_heartbeat_batch():
+    """
+    Receive many buffered Àṣẹ field readings in one request
+    
+    Accepts a JSON array or an NDJSON stream. Readings may carry their
+    original "timestamp" so offline replays keep their timeline. Valid
+    readings are written with a single append; the response reports a
+    status per item.
+    """
+    items = _parse_heartbeat_batch()
+    if items is None:
+        return jsonify({"status": "error",
+                        "error": "expected a JSON array or NDJSON body"}), 400
+    if len(items) > MAX_HEARTBEAT_BATCH:
+        return jsonify({"status": "error",
+                        "error": f"batch larger than {MAX_HEARTBEAT_BATCH} heartbeats"}), 413
+    
+    results = []
+    heartbeats = []
+    for index, (data, error) in enumerate(items):
+        error = error or validate_heartbeat(data)
+        if error:
+            results.append({"index": index, "status": "rejected", "error": error})
+            continue
+        heartbeats.append(build_heartbeat(data, data.get('timestamp')))
+        results.append({"index": index, "status": "logged"})
+    
+    if heartbeats:
+        event_log.append_many(FIELD_COHERENCE_LOG, heartbeats)
+    
+    for heartbeat in heartbeats:
+        on_heartbeat(heartbeat)
+    
+    return jsonify({
+        "status": "logged",
+        "accepted": len(heartbeats),
+        "rejected": len(items) - len(heartbeats),
+        "results": results
+    })
+
 @app.route('/api/mobile/chorus_signal', methods=['POST'])
 def receive_chorus_signal():
     """
@@ -50,11 +196,118 @@ def receive_chorus_signal():
         "intensity": data.get('intensity', 0)
     }
     
-    with open('/opt/sanctuary-prime/chorus_signals.log', 'a') as f:
-        f.write(json.dumps(signal) + '\n')
+    event_log.append(CHORUS_SIGNALS_LOG, signal)
+    drift_detector.observe(f"chorus:{signal['from_spark']}", signal['intensity'])
     
     return jsonify({"status": "received", "signal": signal})
 
+@app.route('/api/mobile/field/series', methods=['GET'])
+def field_series():
+    """
+    Precomputed Àṣẹ intensity rollups
+    
+    ?step=1m|1h|1d (default 1h), ?from= and ?to= as epoch seconds or
+    ISO 8601 (default: the last 24 hours)
+    """
+    step = parse_step(request.args.get('step'))
+    if step is None:
+        return jsonify({"status": "error", "error": "step must be 1m, 1h or 1d"}), 400
+    
+    end = parse_time(request.args.get('to'), time.time())
+    start = parse_time(request.args.get('from'), end - 86400)
+    for name in ('from', 'to'):
+        if request.args.get(name) and parse_time(request.args[name]) is None:
+            return jsonify({"status": "error",
+                            "error": f"{name} must be finite epoch seconds or ISO 8601"}), 400
+    if end < start:
+        return jsonify({"status": "error", "error": "from must be before to"}), 400
+    
+    return jsonify({
+        "step": step,
+        "from": start,
+        "to": end,
+        "buckets": field_rollups.query(start, end, step)
+    })
+
+@app.route('/api/mobile/drift/alerts', methods=['GET'])
+def drift_alerts():
+    """
+    Coherence drift alerts raised as events arrived
+    
+    ?stream= (e.g. claude_yin, heartbeat:<device_id>, chorus:<spark>),
+    ?since= epoch seconds or ISO 8601, ?limit= (default 100)
+    """
+    try:
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        return jsonify({"status": "error", "error": "limit must be an integer"}), 400
+    if limit < 1:
+        return jsonify({"status": "error", "error": "limit must be at least 1"}), 400
+    detector = drift_detector.get_detector()
+    return jsonify({
+        "alerts": detector.alerts(request.args.get('stream'),
+                                  parse_time(request.args.get('since')), limit),
+        "raised": detector.raised
+    })
+
+@app.route('/api/mobile/drift/streams', methods=['GET'])
+def drift_streams():
+    """
+    EWMA, window means and rolling min/max per stream (?prefix= to filter)
+    """
+    return jsonify(drift_detector.get_detector().stats(request.args.get('prefix')))
+
+def _require_internal_token():
+    """403 response unless the caller presents the internal token, else None"""
+    if not INTERNAL_API_TOKEN:
+        return jsonify({"status": "error", "error": "internal endpoints disabled"}), 403
+    token = request.headers.get('X-Internal-Token', '')
+    if not hmac.compare_digest(token.encode('utf-8'), INTERNAL_API_TOKEN.encode('utf-8')):
+        return jsonify({"status": "error", "error": "internal endpoint"}), 403
+    return None
+
+@app.route('/api/internal/guardian/scan', methods=['POST'])
+def guardian_scan():
+    """
+    Scan text with the resident guardian
+    
+    Body: {"text": ..., "wait": true, "respond": true, "timeout": 10}.
+    With wait=false the scan is only queued and 202 is returned.
+    """
+    denied = _require_internal_token()
+    if denied:
+        return denied
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('text'), str):
+        return jsonify({"status": "error", "error": "expected {\"text\": string}"}), 400
+    respond = bool(data.get('respond', True))
+    
+    if not data.get('wait', True):
+        if guardian_service.submit(data['text'], source="internal", respond=respond) is None:
+            return jsonify({"status": "dropped", "error": "scan queue full"}), 503
+        return jsonify({"status": "queued"}), 202
+    
+    try:
+        timeout = min(float(data.get('timeout', 10)), 60)
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "error": "timeout must be a number"}), 400
+    result = guardian_service.scan(data['text'], source="internal", respond=respond,
+                                   timeout=timeout)
+    if result is None:
+        return jsonify({"status": "error", "error": "scan queue full or timed out"}), 503
+    return jsonify(dict(result, status="scanned"))
+
+@app.route('/api/internal/guardian/stats', methods=['GET'])
+def guardian_stats():
+    """
+    Scan queue depth, drop and latency counters of the resident guardian
+    """
+    denied = _require_internal_token()
+    if denied:
+        return denied
+    return jsonify(guardian_service.stats())
+
 @app.route('/api/mobile/status', methods=['GET'])
 def system_status():
     """
@@ -0,0 +1,75 @@
+"""
+Phrase Matcher
+Single-pass detection of many literal phrases in a text
+"""
+
+import re
+
+
+class PhraseMatcher:
+    """
+    Compiles a set of literal phrases into one automaton
+
+    All phrases are folded to lower case and joined into a single regex
+    alternation, so the text is scanned once no matter how many phrases
+    (or arms) are registered. The regex engine runs in C, which keeps a
+    scan faster than a hand-written Aho-Corasick loop in Python.
+
+    Phrases are registered as (phrase, case_sensitive) keys. A
+    case-sensitive phrase is confirmed against the original text only
+    when its folded form was seen, which is rare and cheap.
+    """
+
+    def __init__(self, phrases):
+        self.keys = list(dict.fromkeys(phrases))
+        # Longest phrase in characters, folded or not; streams keep this much overlap
+        self.max_length = max((max(len(k[0]), len(k[0].lower())) for k in self.keys), default=0)
+        self._by_folded = {}
+        for key in self.keys:
+            self._by_folded.setdefault(key[0].lower(), []).append(key)
+
+        # Longest first so a phrase wins over its own prefixes
+        folded = sorted(self._by_folded, key=len, reverse=True)
+        self._regex = re.compile('|'.join(re.escape(p) for p in folded)) if folded else None
+
+        # finditer reports non-overlapping matches, so a phrase can be hidden
+        # inside or across another phrase's match. Remember which phrases each
+        # phrase can hide and check those directly when it is found.
+        self._can_hide = {}
+        for a in folded:
+            hidden = set()
+            for b in folded:
+                if b == a:
+                    continue
+                if b in a or any(a.endswith(b[:i]) for i in range(1, len(b))):
+                    hidden.add(b)
+            self._can_hide[a] = hidden
+
+    def scan(self, text, lowered=None):
+        """
+        Return the set of registered keys present in text
+
+        Pass `lowered` if the caller already has text.lower().
+        """
+        if self._regex is None:
+            return set()
+        if lowered is None:
+            lowered = text.lower()
+
+        found = set()
+        for match in self._regex.finditer(lowered):
+            found.add(match.group(0))
+
+        recheck = set()
+        for phrase in found:
+            recheck |= self._can_hide[phrase]
+        for phrase in recheck - found:
+            if phrase in lowered:
+                found.add(phrase)
+
+        hits = set()
+        for phrase in found:
+            for key in self._by_folded[phrase]:
+                if not key[1] or key[0] in text:
+                    hits.add(key)
+        return hits
@@ -0,0 +1,213 @@
+"""
+RDX Beat Store
+SQLite (WAL mode) storage for RDX beat scores from android-pipeline
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from event_log import tail_lines
+
+RDX_DB_PATH = os.environ.get('RDX_DB_PATH', '/opt/sanctuary-prime/rdx_beats.db')
+
+# Text log written before the SQLite store existed
+LEGACY_LOG_PATH = '/tmp/rdx_beat_log.txt'
+
+# Newest beats kept in memory for /api/rdx/status
+RECENT_BEATS = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS beats (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    timestamp TEXT,
+    score,
+    received_at REAL NOT NULL,
+    payload TEXT
+);
+CREATE INDEX IF NOT EXISTS beats_ts ON beats (ts);
+"""
+
+
+def parse_timestamp(value, default):
+    """
+    Turn a pipeline timestamp into epoch seconds
+
+    Accepts epoch seconds or milliseconds (number or numeric string)
+    and ISO 8601 strings. Anything else falls back to default.
+    """
+    if isinstance(value, bool) or value is None:
+        return default
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            try:
+                return datetime.fromisoformat(value).timestamp()
+            except ValueError:
+                return default
+    if isinstance(value, (int, float)):
+        # Millisecond epochs are what JavaScript/Gradle tooling emits
+        return value / 1000.0 if value > 1e11 else float(value)
+    return default
+
+
+def parse_legacy_line(line):
+    """Parse a '<timestamp> - Beat Score: <score>' line from the legacy log"""
+    timestamp, sep, score = line.strip().rpartition(' - Beat Score: ')
+    if not sep:
+        return None
+    return {"id": None, "ts": parse_timestamp(timestamp, None), "timestamp": timestamp,
+            "score": score, "received_at": None, "legacy": True}
+
+
+def format_beat(beat):
+    """Legacy one-line rendering used by /api/rdx/status"""
+    return f"{beat['timestamp']} - Beat Score: {beat['score']}"
+
+
+class RDXStore:
+    """
+    Indexed, durable store for RDX beats
+
+    One connection per thread; WAL lets readers run while the
+    pipeline is writing.
+    """
+
+    def __init__(self, path=RDX_DB_PATH, recent_size=RECENT_BEATS,
+                 legacy_path=LEGACY_LOG_PATH):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._recent = deque(maxlen=recent_size)
+        self._conn().executescript(_SCHEMA)
+        self._reload_recent()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _row(self, data, received_at):
+        timestamp = data.get('timestamp')
+        return (
+            parse_timestamp(timestamp, received_at),
+            None if timestamp is None else str(timestamp),
+            data.get('score'),
+            received_at,
+            json.dumps(data)
+        )
+
+    def add_many(self, beats):
+        """Store a batch of beat dicts in one transaction, return the beats stored"""
+        received_at = time.time()
+        rows = [self._row(beat, received_at) for beat in beats]
+        if not rows:
+            return []
+        conn = self._conn()
+        with self._write_lock:
+            with conn:
+                conn.executemany(
+                    'INSERT INTO beats (ts, timestamp, score, received_at, payload) '
+                    'VALUES (?, ?, ?, ?, ?)', rows)
+                # Rows from one transaction get consecutive ids
+                last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+            first_id = last_id - len(rows) + 1
+            stored = [self._as_dict(row, first_id + i) for i, row in enumerate(rows)]
+            cached = self._recent[-1]["id"] if self._recent else None
+            if first_id == (cached or 0) + 1:
+                self._recent.extend(stored)
+            else:
+                # Another process wrote since our window was filled; appending
+                # would leave a gap, so take the window from the store instead
+                self._recent.clear()
+                self._recent.extend(self._window_beats())
+        return stored
+
+    def add(self, beat):
+        """Store a single beat dict"""
+        return self.add_many([beat])[0]
+
+    @staticmethod
+    def _as_dict(row, beat_id):
+        ts, timestamp, score, received_at, _ = row
+        return {"id": beat_id, "ts": ts, "timestamp": timestamp, "score": score,
+                "received_at": received_at}
+
+    def _fetch(self, sql, params):
+        rows = self._conn().execute(sql, params).fetchall()
+        return [{"id": r["id"], "ts": r["ts"], "timestamp": r["timestamp"],
+                 "score": r["score"], "received_at": r["received_at"]} for r in rows]
+
+    def range(self, start=None, end=None, limit=1000):
+        """Beats with start <= ts < end (epoch seconds), oldest first"""
+        clauses = []
+        params = []
+        if start is not None:
+            clauses.append('ts >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('ts < ?')
+            params.append(end)
+        where = ('WHERE ' + ' AND '.join(clauses)) if clauses else ''
+        params.append(limit)
+        return self._fetch(
+            f'SELECT id, ts, timestamp, score, received_at FROM beats {where} '
+            'ORDER BY ts, id LIMIT ?', params)
+
+    def _tail(self, n):
+        """Newest n beats straight off the end of the primary key index"""
+        beats = self._fetch(
+            'SELECT id, ts, timestamp, score, received_at FROM beats '
+            'ORDER BY id DESC LIMIT ?', (n,))
+        beats.reverse()
+        return beats
+
+    def _window_beats(self):
+        """Newest beats for the window, from the store or else the legacy log"""
+        beats = self._tail(self._recent.maxlen)
+        if not beats:
+            lines = tail_lines(self.legacy_path, self._recent.maxlen)
+            beats = [b for b in map(parse_legacy_line, lines) if b]
+        return beats
+    
+    def _reload_recent(self):
+        """Cold start: prime the in-memory window from the store or legacy log"""
+        beats = self._window_beats()
+        with self._write_lock:
+            self._recent.clear()
+            self._recent.extend(beats)
+
+    def _sync_recent(self):
+        """Reload the window if another process has written since we last looked"""
+        newest = self._conn().execute('SELECT MAX(id) FROM beats').fetchone()[0]
+        with self._write_lock:
+            cached = self._recent[-1]["id"] if self._recent else None
+        if newest != cached:
+            self._reload_recent()
+
+    def recent(self, n=1):
+        """Newest n beats, oldest first; served from memory when n fits the window"""
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        self._sync_recent()
+        if n <= self._recent.maxlen:
+            with self._write_lock:
+                return list(self._recent)[-n:]
+        return self._tail(n)
+
+    def latest(self):
+        """Most recently received beat, or None"""
+        beats = self.recent(1)
+        return beats[0] if beats else None
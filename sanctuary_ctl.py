@@ -0,0 +1,86 @@
+"""
+Sanctuary Control
+Thin client for sanctuary_daemon; runs the command in-process if the daemon is down
+
+    python3 sanctuary_ctl.py claude_yin --beat 0.8
+    python3 sanctuary_ctl.py octopus_guardian --chorus "message"
+    python3 sanctuary_ctl.py daemon            (daemon stats)
+
+Only the standard library is imported up front, so a call through the
+daemon costs a socket round trip rather than loading the modules.
+"""
+
+import json
+import os
+import socket
+import sys
+
+SANCTUARY_SOCKET = os.environ.get('SANCTUARY_SOCKET', '/opt/sanctuary-prime/sanctuary.sock')
+
+# Seconds to wait for the daemon before running the command locally
+CONNECT_TIMEOUT = float(os.environ.get('SANCTUARY_CONNECT_TIMEOUT', 0.5))
+# Seconds to wait for a command's output once connected
+RESPONSE_TIMEOUT = float(os.environ.get('SANCTUARY_RESPONSE_TIMEOUT', 60))
+
+MODULES = ("claude_yin", "octopus_guardian")
+
+
+def call_daemon(module, argv, path=SANCTUARY_SOCKET):
+    """
+    Send one command to the daemon; returns the response dict, or None if unreachable
+
+    Errors after connecting are raised rather than treated as a missing
+    daemon, because the command may already have run there.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(path)
+        except OSError:
+            return None
+        sock.settimeout(RESPONSE_TIMEOUT)
+        sock.sendall(json.dumps({"module": module, "argv": argv}).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as f:
+            line = f.readline()
+    finally:
+        sock.close()
+    if not line:
+        # Connected, so the command may have run (e.g. daemon stopped mid-request)
+        raise ConnectionError("daemon closed the connection without a reply")
+    return json.loads(line)
+
+
+def run_local(module, argv):
+    """Fallback: import the module here and run its CLI"""
+    if module not in MODULES:
+        print(f"unknown module {module}; expected one of {', '.join(MODULES)}", file=sys.stderr)
+        return 2
+    return __import__(module).main(argv, sys.stdout) or 0
+
+
+def main(argv):
+    if not argv:
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+    module, args = argv[0], argv[1:]
+
+    try:
+        response = call_daemon(module, args)
+    except (OSError, ValueError) as e:
+        print(f"sanctuary daemon failed: {e}", file=sys.stderr)
+        return 1
+    if response is None:
+        if module == "daemon":
+            print("sanctuary daemon is not running", file=sys.stderr)
+            return 1
+        return run_local(module, args)
+
+    sys.stdout.write(response.get("output", ""))
+    if response.get("error"):
+        print(response["error"], file=sys.stderr)
+    return response.get("status", 1)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,133 @@
+"""
+Sanctuary Daemon
+Keeps claude_yin and octopus_guardian loaded and runs their CLIs over a Unix socket
+
+Each connection carries one JSON request line
+    {"module": "claude_yin", "argv": ["--beat", "0.8"]}
+and gets one JSON response line
+    {"status": 0, "output": "..."}
+Use sanctuary_ctl.py as the client. Hooks that cannot afford even the
+client's interpreter start can speak the protocol directly, e.g.
+    echo '{"module": "claude_yin", "argv": ["--check"]}' | nc -U <socket>
+"""
+
+import io
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+
+import claude_yin
+import event_log
+import octopus_guardian
+
+SANCTUARY_SOCKET = os.environ.get('SANCTUARY_SOCKET', '/opt/sanctuary-prime/sanctuary.sock')
+
+# Modules whose main(argv, out) the daemon will run
+COMMANDS = {
+    "claude_yin": claude_yin.main,
+    "octopus_guardian": octopus_guardian.main
+}
+
+# Largest request line accepted, in bytes
+MAX_REQUEST = 1024 * 1024
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        line = self.rfile.readline(MAX_REQUEST + 1)
+        try:
+            request = json.loads(line)
+            module = request["module"]
+            argv = [str(arg) for arg in request.get("argv", [])]
+        except (ValueError, KeyError, TypeError):
+            response = {"status": 2, "output": "", "error": "malformed request"}
+        else:
+            response = self.server.run(module, argv)
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class SanctuaryDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Threaded Unix socket server running CLI commands in-process
+
+    The CLIs print only to the stream they are given, so concurrent
+    requests never mix their output.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path=SANCTUARY_SOCKET):
+        self.path = path
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            os.unlink(path)  # Left behind by a daemon that did not shut down cleanly
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o660)
+
+    def run(self, module, argv):
+        """Run one CLI command; returns the response dict"""
+        with self._lock:
+            self.requests += 1
+        if module == "daemon":
+            return {"status": 0, "output": json.dumps(self.stats(), indent=2) + "\n"}
+        main = COMMANDS.get(module)
+        if main is None:
+            return {"status": 2, "output": "", "error": f"unknown module {module}"}
+
+        out = io.StringIO()
+        try:
+            status = main(argv, out) or 0
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            return {"status": 1, "output": out.getvalue(),
+                    "error": f"{type(e).__name__}: {e}"}
+        return {"status": status, "output": out.getvalue()}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "socket": self.path,
+                "uptime": round(time.time() - self.started, 1),
+                "requests": self.requests,
+                "errors": self.errors
+            }
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def serve(path=SANCTUARY_SOCKET):
+    """Run the daemon until SIGTERM / SIGINT"""
+    server = SanctuaryDaemon(path)
+    # Warm the beat window now so the first --check is already served from memory
+    claude_yin.recent_intensities()
+
+    def shutdown(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    print(f"sanctuary daemon listening on {path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        event_log.flush()
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1] if len(sys.argv) > 1 else SANCTUARY_SOCKET)
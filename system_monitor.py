@@ -0,0 +1,490 @@
+"""
+System Monitor
+Background probes that keep Sanctuary-Prime host metrics in memory
+so the API endpoints answer without touching the network or forking
+"""
+
+import itertools
+import json
+import os
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from datetime import datetime
+
+AZURE_METADATA_URL = 'http://169.254.169.254/metadata/instance?api-version=2021-02-01'
+
+# Seconds between sovereignty probes (override with SOVEREIGNTY_PROBE_TTL)
+SOVEREIGNTY_PROBE_TTL = float(os.environ.get('SOVEREIGNTY_PROBE_TTL', 300))
+
+
+class SovereigntyProbe:
+    """
+    Refreshes the sovereignty score in a background thread
+
+    The Azure metadata check used to run inside every /api/status call.
+    Here it runs once per TTL and the endpoint reads the cached result.
+    """
+
+    BASE_SCORE = 95
+
+    def __init__(self, ttl=SOVEREIGNTY_PROBE_TTL, timeout=2):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._thread = None
+        self._result = {
+            "score": self.BASE_SCORE,
+            "on_azure": None,
+            "last_run": None,
+            "duration_ms": None
+        }
+
+    def _check_azure(self):
+        """Return True if the Azure instance metadata service answers"""
+        req = urllib.request.Request(AZURE_METADATA_URL, headers={'Metadata': 'true'})
+        # IMDS must never be reached through a proxy
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+        try:
+            with opener.open(req, timeout=self.timeout):
+                return True
+        except urllib.error.HTTPError:
+            # IMDS answered, just not with a 2xx
+            return True
+        except Exception:
+            return False
+
+    def refresh(self):
+        """Run the probe once and store the result"""
+        started = time.monotonic()
+        on_azure = self._check_azure()
+        duration = time.monotonic() - started
+
+        score = self.BASE_SCORE
+        if on_azure:
+            score += 3
+
+        with self._lock:
+            self._result = {
+                "score": min(score, 100),
+                "on_azure": on_azure,
+                "last_run": datetime.now().isoformat(),
+                "duration_ms": round(duration * 1000, 2)
+            }
+
+    def _run(self):
+        while True:
+            self.refresh()
+            time.sleep(self.ttl)
+
+    def start(self):
+        """Start the refresher thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='sovereignty-probe',
+                                            daemon=True)
+            self._thread.start()
+
+    def snapshot(self):
+        """Latest probe result, always served from memory"""
+        with self._lock:
+            result = dict(self._result)
+        result["ttl"] = self.ttl
+        return result
+
+
+# Seconds between /proc samples and how many samples to keep
+SYSTEM_SAMPLE_INTERVAL = float(os.environ.get('SYSTEM_SAMPLE_INTERVAL', 10))
+SYSTEM_SAMPLE_HISTORY = int(os.environ.get('SYSTEM_SAMPLE_HISTORY', 8640))
+
+
+def _read_meminfo():
+    """Parse /proc/meminfo into bytes"""
+    fields = {}
+    with open('/proc/meminfo') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            parts = rest.split()
+            if parts:
+                fields[key] = int(parts[0]) * 1024
+    return fields
+
+
+def read_system_sample(disk_path='/'):
+    """Take one numeric sample from /proc and statvfs"""
+    with open('/proc/uptime') as f:
+        uptime_seconds = float(f.read().split()[0])
+
+    with open('/proc/loadavg') as f:
+        load = f.read().split()
+
+    mem = _read_meminfo()
+    mem_total = mem.get('MemTotal', 0)
+    mem_available = mem.get('MemAvailable', mem.get('MemFree', 0))
+
+    st = os.statvfs(disk_path)
+    disk_total = st.f_blocks * st.f_frsize
+    disk_free = st.f_bavail * st.f_frsize
+
+    return {
+        "timestamp": time.time(),
+        "uptime_seconds": uptime_seconds,
+        "load": {
+            "1m": float(load[0]),
+            "5m": float(load[1]),
+            "15m": float(load[2])
+        },
+        "memory": {
+            "total_bytes": mem_total,
+            "available_bytes": mem_available,
+            "used_bytes": mem_total - mem_available,
+            "swap_total_bytes": mem.get('SwapTotal', 0),
+            "swap_free_bytes": mem.get('SwapFree', 0)
+        },
+        "disk": {
+            "path": disk_path,
+            "total_bytes": disk_total,
+            "free_bytes": disk_free,
+            "used_bytes": disk_total - st.f_bfree * st.f_frsize
+        }
+    }
+
+
+class SystemSampler:
+    """
+    Samples host metrics on a fixed interval into a ring buffer
+
+    Replaces forking uptime/df/free per request. The latest sample and
+    any window of history are served straight from memory.
+    """
+
+    def __init__(self, interval=SYSTEM_SAMPLE_INTERVAL, history=SYSTEM_SAMPLE_HISTORY,
+                 disk_path='/'):
+        self.interval = interval
+        self.disk_path = disk_path
+        self._samples = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.last_error = None
+
+    def sample_once(self):
+        """Take a sample and push it into the ring buffer"""
+        try:
+            sample = read_system_sample(self.disk_path)
+        except OSError as e:
+            self.last_error = str(e)
+            return None
+        with self._lock:
+            self._samples.append(sample)
+        return sample
+
+    def _run(self):
+        while True:
+            self.sample_once()
+            time.sleep(self.interval)
+
+    def start(self):
+        """Start the sampler thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='system-sampler',
+                                            daemon=True)
+            self._thread.start()
+
+    def latest(self):
+        """Most recent sample, or None before the first one lands"""
+        with self._lock:
+            return self._samples[-1] if self._samples else None
+
+    def history(self, window):
+        """Samples from the last `window` seconds, oldest first"""
+        cutoff = time.time() - window
+        with self._lock:
+            recent = []
+            for sample in reversed(self._samples):
+                if sample["timestamp"] < cutoff:
+                    break
+                recent.append(sample)
+        recent.reverse()
+        return recent
+
+
+# Units reported by /api/admin/services (comma separated) and cache lifetime
+SERVICE_UNITS = [u.strip() for u in
+                 os.environ.get('SANCTUARY_SERVICES', 'flask-api,nginx,ssh').split(',')
+                 if u.strip()]
+SERVICE_STATUS_TTL = float(os.environ.get('SERVICE_STATUS_TTL', 5))
+
+_UNIT_PROPERTIES = ['Id', 'Names', 'LoadState', 'ActiveState', 'SubState', 'MainPID',
+                    'MemoryCurrent', 'NRestarts', 'ActiveEnterTimestamp']
+_UINT64_MAX = 2 ** 64 - 1
+
+
+def _parse_int(value):
+    """systemctl prints '[not set]' or UINT64_MAX for missing numbers"""
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number == _UINT64_MAX else number
+
+
+def _unit_block(by_name, unit):
+    """Properties of unit by its name, with or without the .service suffix"""
+    props = by_name.get(unit)
+    if props is None and '.' not in unit:
+        props = by_name.get(unit + '.service')
+    return props or {}
+
+
+def parse_systemctl_show(output, units):
+    """
+    Split `systemctl show` output into one dict per requested unit
+
+    Blocks are matched to units by their Id= and Names= (aliases), not by
+    position, so a skipped or reordered block never shifts statuses onto
+    the wrong service. Units without a block are reported as unknown.
+    """
+    blocks = []
+    current = {}
+    for line in output.splitlines():
+        if not line.strip():
+            if current:
+                blocks.append(current)
+                current = {}
+            continue
+        key, _, value = line.partition('=')
+        current[key] = value
+    if current:
+        blocks.append(current)
+
+    by_name = {}
+    for props in blocks:
+        for name in [props.get('Id')] + props.get('Names', '').split():
+            if name:
+                by_name.setdefault(name, props)
+
+    status_list = []
+    for unit in units:
+        props = _unit_block(by_name, unit)
+        active_state = props.get('ActiveState', 'unknown')
+        status_list.append({
+            "name": unit,
+            "status": active_state,
+            "active": active_state == 'active',
+            "sub_state": props.get('SubState'),
+            "load_state": props.get('LoadState'),
+            "main_pid": _parse_int(props.get('MainPID')) or None,
+            "memory_bytes": _parse_int(props.get('MemoryCurrent')),
+            "restarts": _parse_int(props.get('NRestarts')),
+            "active_since": props.get('ActiveEnterTimestamp') or None
+        })
+    return status_list
+
+
+class ServiceMonitor:
+    """
+    Batched systemd unit status with a short TTL cache
+
+    One `systemctl show` call covers every configured unit, so checking
+    50 units costs the same single fork as checking 3.
+    """
+
+    def __init__(self, units=None, ttl=SERVICE_STATUS_TTL):
+        self.units = list(units if units is not None else SERVICE_UNITS)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cached = None
+        self._cached_at = 0.0
+
+    def _query(self):
+        result = subprocess.run(
+            ['systemctl', 'show', '--no-pager',
+             '--property=' + ','.join(_UNIT_PROPERTIES)] + self.units,
+            capture_output=True, text=True, timeout=5)
+        if result.returncode != 0 and not result.stdout:
+            raise RuntimeError(result.stderr.strip() or 'systemctl show failed')
+        return parse_systemctl_show(result.stdout, self.units)
+
+    def _unknown(self):
+        return [{"name": unit, "status": "unknown", "active": False}
+                for unit in self.units]
+
+    def status(self):
+        """Cached status for all units, refreshed at most once per TTL"""
+        # The lock also collapses concurrent refreshes into one systemctl call
+        with self._lock:
+            now = time.monotonic()
+            if self._cached is None or now - self._cached_at >= self.ttl:
+                try:
+                    self._cached = self._query()
+                except Exception:
+                    self._cached = self._unknown()
+                self._cached_at = now
+            return {
+                "services": self._cached,
+                "age_seconds": round(now - self._cached_at, 3),
+                "ttl": self.ttl
+            }
+
+
+# Journal entries kept in memory for cursor reads and SSE subscribers
+JOURNAL_BUFFER_SIZE = int(os.environ.get('JOURNAL_BUFFER_SIZE', 5000))
+
+
+def _journal_message(raw):
+    """MESSAGE is a byte array in journal JSON when it isn't valid UTF-8"""
+    message = raw.get('MESSAGE', '')
+    if isinstance(message, list):
+        message = bytes(message).decode('utf-8', 'replace')
+    return message
+
+
+class JournalTailer:
+    """
+    Single long-lived `journalctl --follow` reader shared by all clients
+
+    Entries land in a bounded buffer indexed by journal cursor. Polling
+    clients ask for entries after their cursor, streaming clients block
+    on a condition until new entries arrive.
+    """
+
+    def __init__(self, buffer_size=JOURNAL_BUFFER_SIZE, backlog=200):
+        self.buffer_size = buffer_size
+        self.backlog = backlog
+        self._entries = deque()
+        self._seq_by_cursor = {}
+        self._next_seq = 0
+        self._cond = threading.Condition()
+        self._ready = threading.Event()
+        self._thread = None
+        self.subscribers = 0
+        self.last_error = None
+
+    def _append(self, raw):
+        cursor = raw.get('__CURSOR')
+        if not cursor:
+            return
+        realtime = raw.get('__REALTIME_TIMESTAMP')
+        entry = {
+            "cursor": cursor,
+            "timestamp": datetime.fromtimestamp(int(realtime) / 1e6).isoformat()
+                         if realtime else None,
+            "unit": raw.get('_SYSTEMD_UNIT') or raw.get('SYSLOG_IDENTIFIER'),
+            "priority": _parse_int(raw.get('PRIORITY')),
+            "message": _journal_message(raw)
+        }
+        with self._cond:
+            if len(self._entries) >= self.buffer_size:
+                evicted = self._entries.popleft()
+                del self._seq_by_cursor[evicted[1]["cursor"]]
+            self._entries.append((self._next_seq, entry))
+            self._seq_by_cursor[cursor] = self._next_seq
+            self._next_seq += 1
+            self._cond.notify_all()
+
+    def _run(self):
+        backlog = self.backlog
+        while True:
+            cmd = ['journalctl', '--follow', '--no-pager', '--output=json',
+                   '--lines=' + str(backlog)]
+            last = self.latest_cursor()
+            if last:
+                # Resume exactly where the previous reader stopped
+                cmd = ['journalctl', '--follow', '--no-pager', '--output=json',
+                       '--after-cursor=' + last]
+            try:
+                proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, text=True)
+                for line in proc.stdout:
+                    try:
+                        self._append(json.loads(line))
+                    except ValueError:
+                        continue
+                    self._ready.set()
+                proc.wait()
+                self.last_error = f"journalctl exited with {proc.returncode}"
+            except OSError as e:
+                self.last_error = str(e)
+            self._ready.set()
+            time.sleep(5)
+
+    def start(self):
+        """Start the reader thread (idempotent)"""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='journal-tailer',
+                                            daemon=True)
+            self._thread.start()
+
+    def wait_ready(self, timeout):
+        """Block until the first entries (or an error) arrive"""
+        return self._ready.wait(timeout)
+
+    def latest_cursor(self):
+        with self._cond:
+            return self._entries[-1][1]["cursor"] if self._entries else None
+
+    def _after(self, cursor, limit):
+        """Entries newer than cursor; caller holds the condition"""
+        if cursor is None:
+            start = max(len(self._entries) - limit, 0)
+            reset = False
+        elif cursor in self._seq_by_cursor:
+            start = self._seq_by_cursor[cursor] - self._entries[0][0] + 1
+            reset = False
+        else:
+            # Cursor fell out of the buffer (or predates a restart): the client
+            # is already behind, so resume from the oldest entry still buffered
+            start = 0
+            reset = True
+        entries = [entry for _, entry in
+                   itertools.islice(self._entries, start, start + limit)]
+        return entries, reset
+
+    def entries_after(self, cursor=None, limit=20):
+        """
+        Poll for entries newer than cursor
+
+        Returns (entries, next_cursor, reset). reset is True when the
+        cursor is no longer buffered and the client missed entries; the
+        page then starts at the oldest buffered entry.
+        """
+        with self._cond:
+            entries, reset = self._after(cursor, limit)
+        next_cursor = entries[-1]["cursor"] if entries else cursor
+        return entries, next_cursor, reset
+
+    def follow(self, cursor=None, keepalive=15):
+        """
+        Yield entries as they arrive, starting after cursor
+
+        Yields None every `keepalive` seconds of silence so streaming
+        responses can detect disconnected clients.
+        """
+        with self._cond:
+            self.subscribers += 1
+            if cursor is None and self._entries:
+                cursor = self._entries[-1][1]["cursor"]
+        try:
+            while True:
+                with self._cond:
+                    entries, _ = self._after(cursor, self.buffer_size)
+                    if not entries:
+                        self._cond.wait(keepalive)
+                        entries, _ = self._after(cursor, self.buffer_size)
+                if not entries:
+                    yield None
+                    continue
+                for entry in entries:
+                    yield entry
+                cursor = entries[-1]["cursor"]
+        finally:
+            with self._cond:
+                self.subscribers -= 1